@@ -1,10 +1,21 @@
 import os
+import sys
+import asyncio
 
 import nonebot
 from loguru import logger
 from pathlib import Path
 from nonebot.adapters.qq import Adapter as QQAdapter  # 避免重复命名
 
+# 非 Windows 平台使用 uvloop 替换默认事件循环
+if sys.platform != "win32":
+    try:
+        import uvloop
+
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
 # 初始化 NoneBot
 nonebot.init()
 
@@ -14,9 +25,25 @@ driver.register_adapter(QQAdapter)
 
 LOGPATH = Path("./logs")
 LOGPATH.mkdir(exist_ok=True)
+# 常规日志异步写入，不做栈帧诊断，避免每次记录都拖慢业务调用
 logger.add(
     LOGPATH.joinpath("latest.log"),
+    level="INFO",
+    encoding="utf-8",
+    enqueue=True,
+    backtrace=False,
+    diagnose=False,
+    rotation="00:00",
+    retention="30 days",
+    compression="tar.xz",
+    colorize=False,
+)
+# 只有错误日志保留完整的回溯与变量诊断
+logger.add(
+    LOGPATH.joinpath("error.log"),
+    level="ERROR",
     encoding="utf-8",
+    enqueue=True,
     backtrace=True,
     diagnose=True,
     rotation="00:00",
@@ -1,7 +1,8 @@
 import ujson
 from pathlib import Path
 import random
-from typing import Dict, Any, Optional
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional
 from loguru import logger
 
 
@@ -9,12 +10,49 @@ from .Monster import get_mon_bons
 from .GlobalData import data_manager
 
 
+# 装备数据缺少字段时使用的默认值
+EQUIPMENT_DEFAULTS: Mapping[str, Any] = MappingProxyType(
+    {
+        "name": "未知装备",
+        "damage": "1d4",
+        "skill": "格斗",
+        "part": "未知部位",
+        "identify_skill": "射击",
+        "des": "看起来很普通",
+        "reply": "",
+        "ex": False,
+        "armor": 0,
+    }
+)
+
+
 class EquipmentDataManager:
     """装备数据管理器"""
 
     def __init__(self, data_file_path: Path):
         self.data_file_path = data_file_path
         self._equipment_data: Dict[str, Any] = data_manager.goods_data
+        # 装备数据在运行期间不变，预先补全缺省字段并生成简要描述
+        self._records: Dict[str, Mapping[str, Any]] = {
+            equipment_id: {**EQUIPMENT_DEFAULTS, **data}
+            for equipment_id, data in self._equipment_data.items()
+        }
+        self._brief_cache: Dict[str, str] = {
+            equipment_id: self._make_brief(equipment_id, record)
+            for equipment_id, record in self._records.items()
+        }
+
+    @staticmethod
+    def _make_brief(equipment_id: str, record: Mapping[str, Any]) -> str:
+        """生成装备简要描述"""
+        return f"ID：{equipment_id} 伤害：{record['damage']}"
+
+    def get_brief(self, equipment_id: str) -> str:
+        """获取装备简要描述"""
+        brief = self._brief_cache.get(equipment_id)
+        if brief is None:
+            return self._make_brief(equipment_id, EQUIPMENT_DEFAULTS)
+        return brief
 
     def get_equipment_info(
         self, equipment_id: str, field: str, default: Any = None
@@ -25,16 +63,16 @@ class EquipmentDataManager:
         Args:
             equipment_id: 装备ID
             field: 字段名
-            default: 默认值
+            default: 记录与 EQUIPMENT_DEFAULTS 中都没有该字段时的返回值
 
         Returns:
             装备字段值
         """
-        try:
-            return self._equipment_data.get(equipment_id, {}).get(field, default)
-        except (KeyError, AttributeError):
-            logger.exception(f"获取装备信息失败: ID={equipment_id}, Field={field}")
-            return default
+        return self.get_record(equipment_id).get(field, default)
+
+    def get_record(self, equipment_id: str) -> Mapping[str, Any]:
+        """获取补全了缺省字段的装备记录，不存在的装备返回默认记录"""
+        return self._records.get(equipment_id, EQUIPMENT_DEFAULTS)
 
     def equipment_exists(self, equipment_id: str) -> bool:
         """检查装备是否存在"""
@@ -48,65 +86,46 @@ class EquipmentService:
     _data_manager = EquipmentDataManager(Path(__file__).parent.joinpath("goods.json"))
 
     @classmethod
-    def get_equipment_reply(cls, equipment_id: str) -> str:
-        """获取装备使用回复"""
-        return cls._data_manager.get_equipment_info(equipment_id, "reply", "")
+    def get_equipment(cls, equipment_id: str) -> "Equipment":
+        """获取预先构造的装备对象"""
+        equipment = _equipment_cache.get(equipment_id)
+        if equipment is None:
+            return Equipment(equipment_id)
+        return equipment
 
     @classmethod
     def get_equipment_name(cls, equipment_id: str) -> str:
         """获取装备名称"""
-        return cls._data_manager.get_equipment_info(equipment_id, "name", "未知装备")
-
-    @classmethod
-    def get_equipment_damage(cls, equipment_id: str) -> str:
-        """获取装备伤害值"""
-        return cls._data_manager.get_equipment_info(equipment_id, "damage", "1d4")
-
-    @classmethod
-    def has_penetration_effect(cls, equipment_id: str) -> bool:
-        """检查是否为贯穿武器"""
-        return cls._data_manager.get_equipment_info(equipment_id, "ex", False)
-
-    @classmethod
-    def get_identify_skill(cls, equipment_id: str) -> str:
-        """获取鉴定技能"""
-        return cls._data_manager.get_equipment_info(
-            equipment_id, "identify_skill", "射击"
-        )
-
-    @classmethod
-    def get_equipment_skill(cls, equipment_id: str) -> str:
-        """获取装备技能"""
-        return cls._data_manager.get_equipment_info(equipment_id, "skill", "格斗")
-
-    @classmethod
-    def validate_equipment_id(cls, equipment_id: str) -> bool:
-        """验证装备ID是否有效"""
-        return cls._data_manager.equipment_exists(equipment_id)
+        return cls._data_manager.get_equipment_info(equipment_id, "name")
 
     @classmethod
     def get_equipment_part(cls, equipment_id: str) -> str:
         """获取装备部位"""
-        return cls._data_manager.get_equipment_info(equipment_id, "part", "未知部位")
-
-    @classmethod
-    def get_equipment_des(cls, equipment_id: str) -> str:
-        """获取装备描述"""
-        return cls._data_manager.get_equipment_info(equipment_id, "des", "看起来很普通")
+        return cls._data_manager.get_equipment_info(equipment_id, "part")
 
     @classmethod
     def str_equipment(cls, equipment_id: str) -> str:
         """对于装备内容进行详细描述"""
-        return f"ID：{equipment_id}\n名称: {cls.get_equipment_name(equipment_id)}\n伤害：{cls.get_equipment_damage(equipment_id)}\n攻击方式：{cls.get_equipment_skill(equipment_id)}\n部位：{cls.get_equipment_part(equipment_id)}\n鉴定技能：{cls.get_identify_skill(equipment_id)}\n描述：{cls.get_equipment_des(equipment_id)}"
+        data = cls._data_manager.get_record(equipment_id)
+        return (
+            f"ID：{equipment_id}\n"
+            f"名称: {data['name']}\n"
+            f"伤害：{data['damage']}\n"
+            f"攻击方式：{data['skill']}\n"
+            f"部位：{data['part']}\n"
+            f"鉴定技能：{data['identify_skill']}\n"
+            f"描述：{data['des']}"
+        )
 
     @classmethod
     def brief_equipment(cls, equipment_dict: Dict[str, dict[str, int]]) -> str:
         """对于装备内容进行简要描述"""
-        result = ""
-        for equipment_id, equipment_info in equipment_dict.items():
-            for equipment_name, quitity in equipment_info.items():
-                result += f" {equipment_name}\nID：{equipment_id} 伤害：{cls.get_equipment_damage(equipment_id)}数量：{quitity}\n"
-        return result
+        get_brief = cls._data_manager.get_brief
+        return "".join(
+            f" {equipment_name}\n{get_brief(equipment_id)}数量：{quitity}\n"
+            for equipment_id, equipment_info in equipment_dict.items()
+            for equipment_name, quitity in equipment_info.items()
+        )
 
 
 class LootService:
@@ -176,17 +195,17 @@ class LootService:
         selected_item_id = random.choice(available_items)
 
         # 验证物品是否存在
-        if not EquipmentService.validate_equipment_id(selected_item_id):
+        equipment_data = EquipmentService._data_manager
+        if not equipment_data.equipment_exists(selected_item_id):
             logger.warning(f"无效的物品ID: {selected_item_id}")
             return None
 
+        data = equipment_data.get_record(selected_item_id)
         return {
             "id": selected_item_id,
-            "name": EquipmentService.get_equipment_name(selected_item_id),
-            "description": EquipmentService._data_manager.get_equipment_info(
-                selected_item_id, "des", "看起来很普通"
-            ),
-            "damage": EquipmentService.get_equipment_damage(selected_item_id),
+            "name": data["name"],
+            "description": data["des"],
+            "damage": data["damage"],
         }
 
     @staticmethod
@@ -206,13 +225,27 @@ class Equipment:
 
     def __init__(self, equipment_id: str):
         self.data = data_manager.goods_data.get(equipment_id, {})
+        # 战斗中频繁读取的字段，缺省值取自 EQUIPMENT_DEFAULTS
+        record = EquipmentService._data_manager.get_record(equipment_id)
+        self.name = record["name"]
+        self.damage = record["damage"]
+        self.reply = record["reply"]
+        self.penetration = record["ex"]
+        self.identify_skill = record["identify_skill"]
+        self.armor = int(record["armor"])
+
+    def __getattr__(self, name: str):
+        """获取装备属性，仅在常规属性查找失败时才会调用"""
+        try:
+            return self.__dict__["data"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
 
-    def __getattribute__(self, name: str):
-        """获取装备属性"""
-        data = object.__getattribute__(self, "data")
-        if name in data:
-            return data.get(name)
-        return object.__getattribute__(self, name)
+# 装备数据在运行期间不变，为每件装备预先构造对象以便复用
+_equipment_cache: Dict[str, Equipment] = {
+    equipment_id: Equipment(equipment_id) for equipment_id in data_manager.goods_data
+}
 
 
 # 模块初始化时验证数据加载
@@ -1,23 +1,79 @@
+import sys
 import random
-from typing import Union, Tuple, Dict, Any, Optional, List
+from functools import lru_cache, partial
+from typing import Union, Tuple, Dict, Any, Mapping, Optional, List
 from loguru import logger
 
 from .dice import *
 from .Investigator import investigator_service, Investigator
 from .Monster import Monster, get_mon
-from .Equipment import EquipmentService, LootService, Equipment
-from .GlobalData import data_manager, Separator
+from .Equipment import Equipment, EquipmentService, LootService
+from .GlobalData import data_manager, Separator, render_template, intern_strings
+
+
+# 回合提示横幅
+_MON_BANNER = "怪物的回合".center(10, "-")
+_INV_BANNER = "你的回合".center(10, "-")
+
+
+@lru_cache(maxsize=256)
+def _compose_damage(weapon_damage: str, db: str) -> str:
+    """拼接武器伤害与伤害加值"""
+    if not db or db == "0":
+        return weapon_damage
+    if db.startswith("-"):
+        return f"{weapon_damage}{db}"
+    return f"{weapon_damage}+{db}"
+
+
+def _apply_armor(expression: str, total_damage: int, armor: int) -> Tuple[str, int]:
+    """从伤害中扣除护甲，伤害最低为0"""
+    if not armor:
+        return expression, total_damage
+    return f"{expression}-{armor}", max(0, total_damage - armor)
+
+
+def _roll_desc(name: str, label: str, dice: int, skill: int, level: int) -> str:
+    """生成单次鉴定的描述"""
+    return f"{name}进行{label}鉴定,{dice}/{skill}【{get_success_description(level)}】"
+
+
+def _pack(*messages: Optional[str]) -> Tuple[str, ...]:
+    """打包回复消息，去掉空消息"""
+    return tuple(message for message in messages if message)
 
 
 class CombatSystem:
     """战斗系统主类"""
 
+    __slots__ = (
+        "player_id",
+        "player_info",
+        "monster",
+        "available_actions",
+        "_inv_hp",
+        "_mon_hp",
+        "player_name",
+        "current_action",
+        "current_turn",
+        "turn_actions",
+        "gun",
+        "bullet",
+        "max_bullet",
+        "_turn_cache",
+        "_armor",
+        "_prompts",
+        "_reply",
+        "_player_dispatch",
+        "_monster_dispatch",
+    )
+
     def __init__(
         self,
         player_id: str,
         player_info: Dict[str, Any],
         monster_id: str,
-        available_actions: Dict[str, Any],
+        available_actions: Mapping[str, Any],
         hp_record: Dict[str, Dict[str, int]],
         player_name: str,
     ):
@@ -25,12 +81,34 @@ class CombatSystem:
         self.player_info = player_info
         self.monster = Monster(monster_id)
         self.available_actions = available_actions
-        self.hp_record = hp_record
+        self._rebuild_prompts()
+        self._inv_hp = hp_record[self.player_id]["inv"]
+        self._mon_hp = hp_record[self.player_id]["mon"]
         self.player_name = player_name
         self.current_action = None
+        self.turn_actions = frozenset()
+        # 回合内的装备与怪物行动缓存，回合结束或装备损坏时清空
+        self._turn_cache: Dict[Any, Any] = {}
+        self._refresh_armor()
+        self._reply = data_manager.reply_data
+        # 行动分派表只在开局构建一次
+        # 键名驻留后，与驻留过的指令比较时只需比较指针
+        self._player_dispatch = intern_strings(
+            {
+                "格斗": self._melee_attack,
+                "射击": partial(self._ranged_attack, 1),
+                "二连射": partial(self._ranged_attack, 2),
+                "三连射": partial(self._ranged_attack, 3),
+                "换弹": self._change_bomb,
+            }
+        )
+        self._monster_dispatch = intern_strings(
+            {"反击": self._counter_attack, "闪避": self._dodge}
+        )
         self.gun = investigator_service.get_equipped_id(player_id, "远程")
+        self.bullet = self.max_bullet = 0
         if self.gun:
-            gun = Equipment(self.gun)
+            gun = EquipmentService.get_equipment(self.gun)
             self.bullet = gun.bullet
             self.max_bullet = self.bullet
 
@@ -40,18 +118,27 @@ class CombatSystem:
             mon=self.monster,
             qq=self.player_id,
             name=self.player_name,
+            action_dict=self.available_actions,
         )
         self.current_turn = turn
+        self._refresh_turn_actions()
         return replys
 
+    @property
+    def hp_record(self) -> Dict[str, Dict[str, int]]:
+        """当前HP记录，仅供外部读取"""
+        return {self.player_id: {"inv": self._inv_hp, "mon": self._mon_hp}}
+
     def fight_is_over(self) -> bool:
         """检查战斗是否结束"""
-        player_hp = self.hp_record[self.player_id]["inv"]
-        monster_hp = self.hp_record[self.player_id]["mon"]
-        return player_hp <= 0 or monster_hp <= 0
+        return self._inv_hp <= 0 or self._mon_hp <= 0
 
     def execute_action(self, action: str) -> Tuple:
         """执行行动"""
+        action = sys.intern(action)
+        if action not in self.turn_actions:
+            logger.warning(f"当前回合不可用的行动: {action}")
+            return ()
         self.current_action = action
 
         if self.current_turn == "inv":
@@ -61,15 +148,7 @@ class CombatSystem:
 
     def _execute_player_action(self, action: str) -> Tuple:
         """执行玩家行动"""
-        action_handlers = {
-            "格斗": self._melee_attack,
-            "射击": lambda: self._ranged_attack(1),
-            "二连射": lambda: self._ranged_attack(2),
-            "三连射": lambda: self._ranged_attack(3),
-            "换弹": lambda: self._change_bomb,
-        }
-
-        handler = action_handlers.get(action)
+        handler = self._player_dispatch.get(action)
         if handler:
             return handler()
         else:
@@ -78,9 +157,7 @@ class CombatSystem:
 
     def _execute_monster_action(self, action: str) -> Tuple:
         """执行怪物回合行动"""
-        action_handlers = {"反击": self._counter_attack, "闪避": self._dodge}
-
-        handler = action_handlers.get(action)
+        handler = self._monster_dispatch.get(action)
         if handler:
             return handler()
         else:
@@ -90,15 +167,13 @@ class CombatSystem:
     def _melee_attack(self) -> Tuple:
         """近战攻击"""
         # 获取装备信息
-        equipped_item = investigator_service.get_equipped_id(
-            self.player_id, action=self.current_action  # type: ignore
-        )
-        if not equipped_item:
+        equipment = self._get_equipment(self.current_action)  # type: ignore
+        if not equipment:
             logger.exception(f"玩家 {self.player_id} 没有装备格斗武器")
             return ()
 
-        action_reply = EquipmentService.get_equipment_reply(equipped_item)
-        monster_action = self.monster.get_action(self.current_turn)
+        action_reply = equipment.reply
+        monster_action = self._get_monster_action()
 
         # 从玩家信息中获取技能值
         player_skill = self.player_info.get(self.current_action, 25)  # type: ignore
@@ -108,20 +183,32 @@ class CombatSystem:
         player_wins = confrontation.get_result("反击")
 
         # 构建鉴定描述
-        player_roll_desc = f"{self.player_name}进行格斗鉴定,{confrontation.dice1}/{confrontation.skill1}【{get_success_description(confrontation.level1)}】"
+        player_roll_desc = _roll_desc(
+            self.player_name,
+            "格斗",
+            confrontation.dice1,
+            confrontation.skill1,
+            confrontation.level1,
+        )
         # TO DO: 根据怪物的行动优化
-        monster_roll_desc = f"{self.monster.名字}进行反击鉴定,{confrontation.dice2}/{confrontation.skill2}【{get_success_description(confrontation.level2)}】"
-        roll_description = f"{player_roll_desc}\n{monster_roll_desc}"
+        monster_roll_desc = _roll_desc(
+            self.monster.名字,
+            "反击",
+            confrontation.dice2,
+            confrontation.skill2,
+            confrontation.level2,
+        )
+        roll_lines = [player_roll_desc, monster_roll_desc]
 
-        equipment_name = EquipmentService.get_equipment_name(equipped_item)
+        equipment_name = equipment.name
 
         if confrontation.level1 == SuccessLevel.CRITICAL_FAILURE:
-            des = self._handle_critical_failure(equipment_name)
-            roll_description += f"\n{des}"
+            roll_lines.append(self._handle_critical_failure(equipment_name))
+        roll_description = "\n".join(roll_lines)
         if player_wins:
             return self._handle_successful_attack(
                 confrontation,
-                equipped_item,
+                equipment,
                 action_reply,
                 monster_action["counterattack"],
                 roll_description,
@@ -141,40 +228,31 @@ class CombatSystem:
     ) -> str:
         """处理大失败情况"""
         if equipment != "弹簧折刀":
-            player_text = self._get_reply_text("反击大失败").replace("$装备", equipment)
+            player_text = render_template(
+                self._get_reply_text("反击大失败"), 装备=equipment
+            )
         else:
             damage = roll_dice("1d4")
             self._apply_damage_to_player(damage[1])
-            player_text = (
-                self._get_reply_text("大失败_初始")
-                .replace("$骰子", "1d4")
-                .replace("$伤害", damage[0])
+            player_text = render_template(
+                self._get_reply_text("大失败_初始"), 骰子="1d4", 伤害=damage[0]
             )
 
-        investigator_service.break_equipped_item(self.player_id, self.current_action)  # type: ignore
-        self.available_actions = investigator_service.get_available_actions(
-            self.player_id
-        )
+        self._break_equipped_item(self.current_action)  # type: ignore
         return player_text
 
     def _handle_successful_attack(
         self,
         confrontation: ConfrontationRoll,
-        equipped_item: str,
+        equipment: Equipment,
         action_reply: str,
         monster_reply: str,
         roll_description: str,
     ) -> Tuple:
         """处理成功攻击"""
-        damage = EquipmentService.get_equipment_damage(equipped_item)
-        has_penetration = EquipmentService.has_penetration_effect(equipped_item)
-        equipment_name = EquipmentService.get_equipment_name(equipped_item)
-        db: str = self.player_info.get("db", "0")
-        if db != "0":
-            if db.startswith("-"):
-                damage += db
-            else:
-                damage += f"+{db}"
+        damage = _compose_damage(equipment.damage, self.player_info.get("db", "0"))
+        has_penetration = equipment.penetration
+        equipment_name = equipment.name
 
         damage_expression = self._calculate_damage_expression(
             damage, confrontation.level1, has_penetration
@@ -185,15 +263,16 @@ class CombatSystem:
         else:
             reply_template = self._get_reply_text("格斗成功")
 
-        player_text = (
-            reply_template.replace("$装备", equipment_name)
-            .replace("$伤害", str(damage_expression[1]))
-            .replace("$骰子", damage_expression[0])
+        player_text = render_template(
+            reply_template,
+            装备=equipment_name,
+            伤害=damage_expression[1],
+            骰子=damage_expression[0],
         )
 
         monster_text = self._apply_damage_to_monster(damage_expression[1])
 
-        return (
+        return _pack(
             action_reply,
             monster_reply,
             roll_description,
@@ -213,27 +292,23 @@ class CombatSystem:
         """处理失败攻击"""
         if confrontation.level1 < 1 and confrontation.level2 < 1:
             action = self.current_action
-            player_text = self._get_reply_text(f"{action}失败").replace(
-                "$装备", equipment
+            player_text = render_template(
+                self._get_reply_text(f"{action}失败"), 装备=equipment
             )
             monster_text = monster_action["counter_false"]
         else:
             monster_damage = monster_action["damage"]
-            armor = int(investigator_service.get_armor(self.player_id))
+            damage_expression = self._armored_damage(monster_damage, self._armor)
 
-            damage_expression = self._calculate_damage_expression(
-                monster_damage, armor=armor
-            )
-
-            monster_text = (
-                monster_action["counter_succ"]
-                .replace("$伤害", str(damage_expression[1]))
-                .replace("$骰子", damage_expression[0])
+            monster_text = render_template(
+                monster_action["counter_succ"],
+                伤害=damage_expression[1],
+                骰子=damage_expression[0],
             )
 
             player_text = self._apply_damage_to_player(damage_expression[1])
 
-        return (
+        return _pack(
             action_reply,
             monster_action["counterattack"],
             roll_description,
@@ -259,20 +334,20 @@ class CombatSystem:
 
     def _single_shot(self) -> Tuple:
         """单发射击"""
-        equipped_item = investigator_service.get_equipped_id(
-            self.player_id, action=self.current_action  # type: ignore
-        )
-        if not equipped_item:
+        equipment = self._get_equipment(self.current_action)  # type: ignore
+        if not equipment:
             logger.exception(f"玩家 {self.player_id} 没有装备远程武器")
             return ()
 
-        skill_name = EquipmentService.get_identify_skill(equipped_item)
+        skill_name = equipment.identify_skill
         player_skill = self.player_info.get(skill_name, 20)
-        damage = EquipmentService.get_equipment_damage(equipped_item)
-        equipment_name = EquipmentService.get_equipment_name(equipped_item)
+        damage = equipment.damage
+        equipment_name = equipment.name
 
         roll = DiceRoll(player_skill)
-        roll_description = f"{self.player_name}进行{skill_name}鉴定,{roll.dice}/{roll.skill}【{get_success_description(roll.level)}】"
+        roll_description = _roll_desc(
+            self.player_name, skill_name, roll.dice, roll.skill, roll.level
+        )
 
         if roll.level > SuccessLevel.FAILURE:
             damage_expression = self._calculate_damage_expression(damage, roll.level, 1)
@@ -281,30 +356,24 @@ class CombatSystem:
             else:
                 reply_template = self._get_reply_text("射击成功")
 
-            player_text = reply_template.replace(
-                "$伤害", str(damage_expression[1])
-            ).replace("$骰子", damage_expression[0])
+            player_text = render_template(
+                reply_template, 伤害=damage_expression[1], 骰子=damage_expression[0]
+            )
             monster_text = self._apply_damage_to_monster(damage_expression[1])
 
         elif roll.level == SuccessLevel.CRITICAL_FAILURE:
-            player_text = self._get_reply_text("射击大失败").replace(
-                "$装备", equipment_name
+            player_text = render_template(
+                self._get_reply_text("射击大失败"), 装备=equipment_name
             )
             monster_text = None
-            investigator_service.break_equipped_item(
-                self.player_id, self.current_action
-            )
-            self.gun = 0
-            self.available_actions = investigator_service.get_available_actions(
-                self.player_id
-            )
+            self._break_gun()
             # damage_eq(self.player_id, self.current_action)
         else:
             player_text = self._get_reply_text("射击失败")
             monster_text = None
 
-        return (
-            EquipmentService.get_equipment_reply(equipped_item),
+        return _pack(
+            equipment.reply,
             roll_description,
             player_text,
             monster_text,
@@ -313,41 +382,33 @@ class CombatSystem:
 
     def _multiple_shot(self, shot_count: int) -> Tuple:
         """多发射击"""
-        equipped_item = investigator_service.get_equipped_id(
-            self.player_id, action=self.current_action  # type: ignore
-        )
-        if not equipped_item:
+        equipment = self._get_equipment(self.current_action)  # type: ignore
+        if not equipment:
             logger.exception(f"玩家 {self.player_id} 没有装备远程武器")
             return ()
 
-        skill_name = EquipmentService.get_identify_skill(equipped_item)
+        skill_name = equipment.identify_skill
         player_skill = self.player_info.get(skill_name, 20)
-        damage = EquipmentService.get_equipment_damage(equipped_item)
-        equipment_name = EquipmentService.get_equipment_name(equipped_item)
+        damage = equipment.damage
+        equipment_name = equipment.name
 
         roll_descriptions = []
         total_damage = 0
         player_text = ""
 
-        for _ in range(shot_count):
-            roll = PenaltyDiceRoll(player_skill)
+        for roll in PenaltyDiceRoll.roll_many(player_skill, shot_count):
             roll_descriptions.append(
                 f"{self.player_name}进行{skill_name}鉴定,P={roll.dice}[惩罚骰:{roll.penalty_rolls}] "
                 f"{roll.final_result}/{roll.skill}【{get_success_description(roll.level)}】"
             )
 
             if roll.level == SuccessLevel.CRITICAL_FAILURE:
-                player_text += f'{self._get_reply_text("射击大失败")}\n'.replace(
-                    "$装备", equipment_name
+                player_text += render_template(
+                    self._get_reply_text("射击大失败"), 装备=equipment_name
                 )
+                player_text += "\n"
                 # damage_eq(self.player_id, self.current_action)
-                investigator_service.break_equipped_item(
-                    self.player_id, self.current_action
-                )
-                self.gun = 0
-                self.available_actions = investigator_service.get_available_actions(
-                    self.player_id
-                )
+                self._break_gun()
                 break
             elif roll.level > SuccessLevel.FAILURE:
                 damage_expression = self._calculate_damage_expression(
@@ -360,8 +421,8 @@ class CombatSystem:
         player_text += f"总伤害：{total_damage}"
         monster_text = self._apply_damage_to_monster(total_damage)
 
-        return (
-            EquipmentService.get_equipment_reply(equipped_item),
+        return _pack(
+            equipment.reply,
             roll_description,
             player_text,
             monster_text,
@@ -381,15 +442,13 @@ class CombatSystem:
         if action == "闪避":
             action_reply = self._get_reply_text("闪避")
         else:
-            equipped_item = investigator_service.get_equipped_id(
-                self.player_id, action=action
-            )
-            if not equipped_item:
+            equipment = self._get_equipment(action)
+            if not equipment:
                 logger.exception(f"玩家 {self.player_id} 没有装备 {action} 武器")
                 return ()
-            action_reply = EquipmentService.get_equipment_reply(equipped_item)
+            action_reply = equipment.reply
 
-        monster_action = self.monster.get_action(self.current_turn)
+        monster_action = self._get_monster_action()
 
         monster_skill = monster_action["skill"]
         player_skill = self.player_info.get(action, "")
@@ -397,15 +456,27 @@ class CombatSystem:
             player_skill = self.player_info.get("格斗", 25)
         confrontation = ConfrontationRoll(monster_skill, player_skill)
         monseter_succeeds = confrontation.get_result(action)
-        monster_roll_desc = f"{self.monster.名字}进行鉴定,{confrontation.dice1}/{confrontation.skill1}【{get_success_description(confrontation.level1)}】"
-        player_roll_desc = f"{self.player_name}进行{action}鉴定,{confrontation.dice2}/{confrontation.skill2}【{get_success_description(confrontation.level2)}】"
-        roll_description = f"{monster_roll_desc}\n{player_roll_desc}"
+        monster_roll_desc = _roll_desc(
+            self.monster.名字,
+            "",
+            confrontation.dice1,
+            confrontation.skill1,
+            confrontation.level1,
+        )
+        player_roll_desc = _roll_desc(
+            self.player_name,
+            action,
+            confrontation.dice2,
+            confrontation.skill2,
+            confrontation.level2,
+        )
+        roll_lines = [monster_roll_desc, player_roll_desc]
         monster_text = None
 
         if confrontation.level2 == SuccessLevel.CRITICAL_FAILURE and action != "闪避":
-            equipment_name = EquipmentService.get_equipment_name(equipped_item)
-            des = self._handle_critical_failure(equipment_name)
-            roll_description += f"\n{des}"
+            equipment_name = equipment.name
+            roll_lines.append(self._handle_critical_failure(equipment_name))
+        roll_description = "\n".join(roll_lines)
         # 怪物造成伤害
         if monseter_succeeds:
             monster_text, player_text = self._handle_monster_success(
@@ -423,7 +494,7 @@ class CombatSystem:
             # 对怪物造成伤害
             player_text, monster_text = self._handle_successful_counter(monster_action)
 
-        return (
+        return _pack(
             monster_action["attack"],
             action_reply,
             roll_description,
@@ -434,27 +505,19 @@ class CombatSystem:
 
     def _handle_successful_counter(self, monster_action: Dict) -> Tuple:
         """处理成功反击"""
-        equipped_item = investigator_service.get_equipped_id(
-            self.player_id, action=self.current_action
-        )
-        if not equipped_item:
+        equipment = self._get_equipment(self.current_action)  # type: ignore
+        if not equipment:
             return "反击失败", ""
 
-        damage = EquipmentService.get_equipment_damage(equipped_item)
-        name = EquipmentService.get_equipment_name(equipped_item)
-        db = self.player_info.get("db", "0")
-        if db != "0":
-            if db.startswith("-"):
-                damage += db
-            else:
-                damage += f"+{db}"
+        damage = _compose_damage(equipment.damage, self.player_info.get("db", "0"))
+        name = equipment.name
         # print(damage)
-        damage_expression = self._calculate_damage_expression(damage)
-        player_text = (
-            self._get_reply_text("反击成功")
-            .replace("$装备", name)
-            .replace("$伤害", str(damage_expression[1]))
-            .replace("$骰子", damage_expression[0])
+        damage_expression = self._normal_damage(damage)
+        player_text = render_template(
+            self._get_reply_text("反击成功"),
+            装备=name,
+            伤害=damage_expression[1],
+            骰子=damage_expression[0],
         )
 
         monster_text = self._apply_damage_to_monster(damage_expression[1])
@@ -465,15 +528,15 @@ class CombatSystem:
     ) -> Tuple:
         """处理怪物成功"""
         monster_damage = monster_action["damage"]
-        armor = int(investigator_service.get_armor(self.player_id))
+        armor = self._armor
         damage_expression = self._calculate_damage_expression(
             monster_damage, confrontation.level1, monster_action.get("ex", 0), armor
         )
 
-        monster_text = (
-            monster_action["attack_succ"]
-            .replace("$伤害", str(damage_expression[1]))
-            .replace("$骰子", damage_expression[0])
+        monster_text = render_template(
+            monster_action["attack_succ"],
+            伤害=damage_expression[1],
+            骰子=damage_expression[0],
         )
 
         player_text = (
@@ -498,22 +561,31 @@ class CombatSystem:
         Returns:
             (伤害表达式, 实际伤害)
         """
+        # 常见情况：无护甲、非大成功
+        if not armor and success_level <= SuccessLevel.HARD_SUCCESS:
+            return self._normal_damage(damage)
+
         # 计算基础伤害
         if success_level > SuccessLevel.HARD_SUCCESS and extra_damage:
-            base_expression = self._double_damage(damage)
+            expression, total_damage = self._double_damage(damage)
         elif success_level > SuccessLevel.HARD_SUCCESS:
-            base_expression = roll_dice(damage, use_max=True)
+            expression, total_damage = self._max_damage(damage)
         else:
-            base_expression = (damage, roll_dice(damage)[1])
+            expression, total_damage = self._normal_damage(damage)
 
-        expression, total_damage = base_expression
+        return _apply_armor(expression, total_damage, armor)
 
-        # 应用护甲
-        if armor:
-            total_damage = max(0, total_damage - armor)
-            expression = f"{expression}-{armor}"
+    def _normal_damage(self, damage: str) -> Tuple[str, int]:
+        """普通伤害计算，直接按缓存的解析结果掷骰"""
+        return damage, roll_parsed(parse_dice(damage))[1]
 
-        return expression, total_damage
+    def _armored_damage(self, damage: str, armor: int) -> Tuple[str, int]:
+        """普通伤害减去护甲"""
+        return _apply_armor(*self._normal_damage(damage), armor)
+
+    def _max_damage(self, damage: str) -> Tuple[str, int]:
+        """满值伤害计算"""
+        return roll_dice(damage, use_max=True)
 
     def _double_damage(self, damage: str) -> Tuple[str, int]:
         """双倍伤害计算"""
@@ -528,8 +600,8 @@ class CombatSystem:
     def _apply_damage_to_monster(self, damage: int) -> str:
         """对怪物造成伤害"""
         actual_damage = self.monster.damage_to_mon(damage)
-        current_monster_hp = self.hp_record[self.player_id]["mon"]
-        self.hp_record[self.player_id]["mon"] -= actual_damage
+        current_monster_hp = self._mon_hp
+        self._mon_hp -= actual_damage
 
         if current_monster_hp / 2 < actual_damage:
             return self.monster.高伤害
@@ -540,8 +612,8 @@ class CombatSystem:
 
     def _apply_damage_to_player(self, damage: int) -> str:
         """对玩家造成伤害"""
-        current_player_hp = self.hp_record[self.player_id]["inv"]
-        self.hp_record[self.player_id]["inv"] -= damage
+        current_player_hp = self._inv_hp
+        self._inv_hp -= damage
 
         if current_player_hp / 2 < damage:
             return self._get_reply_text("高伤害")
@@ -552,11 +624,13 @@ class CombatSystem:
 
     def _end_turn(self):
         """结束当前回合"""
-        player_hp = self.hp_record[self.player_id]["inv"]
-        monster_hp = self.hp_record[self.player_id]["mon"]
+        self._turn_cache.clear()
+        player_hp = self._inv_hp
+        monster_hp = self._mon_hp
 
         if player_hp > 0 and monster_hp > 0:
             self.current_turn = "mon" if self.current_turn == "inv" else "inv"
+            self._refresh_turn_actions()
             if self.gun:
                 bullet_num = f"当前子弹剩余：{self.bullet}\n"
                 return bullet_num + self._get_turn_message(player_hp)
@@ -568,68 +642,127 @@ class CombatSystem:
         else:
             return self._handle_victory()
 
-    def _get_turn_message(self, player_hp: int) -> str:
-        """获取回合开始消息"""
-        if self.current_turn == "mon":
-            reply = f'{"怪物的回合".center(10, "-")}\n当前剩余HP：{player_hp}\n请选择行动：\n'
-            for action in self.available_actions["mon"]:
-                reply += f"【/行动 {action}】\n"
-        else:
-            reply = (
-                f'{"你的回合".center(10, "-")}\n当前剩余HP：{player_hp}\n请选择行动：\n'
+    def _get_equipped_id(self, action: str) -> Optional[str]:
+        """获取行动对应的装备ID，同一回合内只查询一次"""
+        key = ("equip", action)
+        if key not in self._turn_cache:
+            self._turn_cache[key] = investigator_service.get_equipped_id(
+                self.player_id, action=action
+            )
+        return self._turn_cache[key]
+
+    def _get_equipment(self, action: str) -> Optional[Equipment]:
+        """获取行动对应的装备对象，未装备时返回None"""
+        equipped_item = self._get_equipped_id(action)
+        if not equipped_item:
+            return None
+        return EquipmentService.get_equipment(equipped_item)
+
+    def _get_monster_action(self) -> Dict:
+        """获取怪物本回合的行动，同一回合内只抽取一次"""
+        if "monster_action" not in self._turn_cache:
+            self._turn_cache["monster_action"] = self.monster.get_action(
+                self.current_turn
             )
-            for action in self.available_actions["inv"]:
-                reply += f"【/行动 {action}】\n"
+        return self._turn_cache["monster_action"]
 
-        return reply.strip()
+    def _refresh_armor(self):
+        """读取玩家护甲值，只在开局与装备损坏时调用"""
+        self._armor = investigator_service.get_armor(self.player_id)
+
+    def _break_equipped_item(self, action: str):
+        """破坏行动对应的装备，并刷新缓存与可用行动"""
+        investigator_service.break_equipped_item(self.player_id, action)
+        self._turn_cache.clear()
+        self.available_actions = investigator_service.get_available_actions(
+            self.player_id
+        )
+        self._rebuild_prompts()
+        self._refresh_armor()
+
+    def _break_gun(self):
+        """射击大失败时破坏枪械，直接清空弹药而不再读取装备数据"""
+        self._break_equipped_item(self.current_action)  # type: ignore
+        self.gun = 0
+        self.bullet = self.max_bullet = 0
+
+    def _rebuild_prompts(self):
+        """可用行动变化时重新生成各方的行动提示"""
+        self._prompts = {
+            side: "".join(f"【/行动 {action}】\n" for action in actions)
+            for side, actions in self.available_actions.items()
+        }
+
+    def _refresh_turn_actions(self):
+        """回合切换时缓存本回合可用行动，供行动校验使用"""
+        self.turn_actions = frozenset(
+            map(sys.intern, self.available_actions.get(self.current_turn, ()))
+        )
+
+    def _get_turn_message(self, player_hp: int) -> str:
+        """获取回合开始消息"""
+        banner = _MON_BANNER if self.current_turn == "mon" else _INV_BANNER
+        reply = f"{banner}\n当前剩余HP：{player_hp}\n请选择行动：\n"
+        return (reply + self._prompts[self.current_turn]).strip()
 
     def _handle_victory(self) -> str:
         """处理胜利情况"""
         search_skill = self.player_info.get("侦查", 25)
         search_roll = DiceRoll(search_skill)
-        search_desc = f"{self.player_name}进行侦查鉴定,{search_roll.dice}/{search_roll.skill}【{get_success_description(search_roll.level)}】"
+        search_desc = _roll_desc(
+            self.player_name,
+            "侦查",
+            search_roll.dice,
+            search_roll.skill,
+            search_roll.level,
+        )
 
+        item = None
         if search_roll.level > SuccessLevel.FAILURE:
-
             gold, item, bonus = LootService.get_loot_reward(self.monster.data.get("id"))
-            if item:
-                item_id = item.get(
-                    "id",
-                )
-                investigator_service.add_item_to_inventory(self.player_id, item_id)
-
         else:
             bonus = self._get_reply_text("侦查失败")
-        investigator_service.update_investigator(
-            self.player_id, {"day": self.player_info.get("day", 1) + 1}
-        )
+
+        # 战利品与天数在同一事务中写入，任一步失败则抛出异常让事务整体回滚
+        try:
+            with investigator_service.transaction():
+                if item and not investigator_service.add_item_to_inventory(
+                    self.player_id, item.get("id")
+                ):
+                    raise RuntimeError(f"添加战利品失败: {item.get('id')}")
+                if not investigator_service.update_investigator(
+                    self.player_id, {"day": self.player_info.get("day", 1) + 1}
+                ):
+                    raise RuntimeError("更新天数失败")
+        except RuntimeError as e:
+            logger.error(f"胜利结算已回滚: QQ={self.player_id}, Error={e}")
         return f"{self.monster.结局}{Separator}{search_desc}{Separator}{bonus}"
 
     def _get_reply_text(self, key: str) -> str:
-        """获取回复文本"""
-        # 这里可以从数据库或配置文件中获取，暂时返回简单文本
-        reply_texts = data_manager.reply_data
-        return reply_texts.get(key, f"[{key}]")
-
-
-def first(inv: Investigator, mon: Monster, qq, name):
+        """获取回复文本，缺失时才生成占位文本"""
+        try:
+            return self._reply[key]
+        except KeyError:
+            return f"[{key}]"
+
+
+def first(
+    inv: Investigator,
+    mon: Monster,
+    qq,
+    name,
+    action_dict: Optional[Mapping[str, Tuple[str, ...]]] = None,
+):
     confrontation = ConfrontationRoll(inv.敏捷, mon.敏捷)
     turn = "inv" if confrontation.get_result("先攻") else "mon"
     dex1_res = f"{name}进行敏捷鉴定：\n{confrontation.dice1}/{confrontation.skill1} 【{get_success_description(confrontation.level1)}】\n"
     dex2_res = f"{mon.名字}进行敏捷鉴定：\n{confrontation.dice2}/{confrontation.skill2} 【{get_success_description(confrontation.level2)}】\n"
-    action_dict = investigator_service.get_available_actions(qq)
-    if turn == "inv":
-        replys = (
-            f"{dex1_res}{dex2_res}调查员回合".center(10, "-") + "\n" + "请选择行动：\n"
-        )
-        for i in action_dict["inv"]:
-            replys += f"【/行动 {i}】\n"
-    else:
-        replys = (
-            f"{dex1_res}{dex2_res}怪物回合".center(10, "-") + "\n" + "请选择行动：\n"
-        )
-        for i in action_dict["mon"]:
-            replys += f"【/行动 {i}】\n"
+    if action_dict is None:
+        action_dict = investigator_service.get_available_actions(qq)
+    title = "调查员回合" if turn == "inv" else "怪物回合"
+    # 整段文本远超10个字符，原先的 center(10, "-") 不会产生任何填充
+    replys = f"{dex1_res}{dex2_res}{title}\n请选择行动：\n"
+    replys += "".join(f"【/行动 {i}】\n" for i in action_dict[turn])
     return turn, replys, action_dict
 
 
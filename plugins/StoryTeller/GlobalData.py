@@ -1,55 +1,110 @@
-import ujson
+import sys
+import orjson
+from functools import cached_property
 from pathlib import Path
+from types import MappingProxyType
 from typing import Dict, Any
 from loguru import logger
 
 Separator = "\n------------------\n"
 
+# 不超过该长度的字符串值会被驻留（部位、技能名等大量重复的短文本）
+_INTERN_MAX_LEN = 8
+
+
+# 回复模板中的占位符，加载时转换为 str.format_map 使用的命名字段
+TEMPLATE_VARS = ("装备", "伤害", "骰子")
+
+
+class _Template(str):
+    """编译后的回复模板，原文中的花括号已转义"""
+
+    __slots__ = ()
+
+
+class _TemplateValues(dict):
+    """模板取值，缺少的占位符按原来的 $名称 形式保留"""
+
+    def __missing__(self, key: str) -> str:
+        return f"${key}"
+
+
+def render_template(template: str, **values: Any) -> str:
+    """一次性填充回复模板中的占位符，未编译为模板的文本原样返回"""
+    if type(template) is not _Template:
+        return template
+    return template.format_map(_TemplateValues(values))
+
+
+def _compile_templates(value: Any) -> Any:
+    """将数据中的 $装备 等占位符转换为 {装备} 形式"""
+    if isinstance(value, dict):
+        return {k: _compile_templates(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_compile_templates(v) for v in value]
+    if isinstance(value, str) and "$" in value:
+        if not any(f"${name}" in value for name in TEMPLATE_VARS):
+            return value
+        # 先转义原文中的花括号，再把变量替换为格式化字段
+        template = value.replace("{", "{{").replace("}", "}}")
+        for name in TEMPLATE_VARS:
+            template = template.replace(f"${name}", f"{{{name}}}")
+        return _Template(template)
+    return value
+
+
+def intern_strings(value: Any) -> Any:
+    """驻留字典键与短字符串值，让重复文本共享同一对象"""
+    if isinstance(value, dict):
+        return {sys.intern(k): intern_strings(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [intern_strings(v) for v in value]
+    if isinstance(value, str) and len(value) <= _INTERN_MAX_LEN:
+        return sys.intern(value)
+    return value
+
 
 class DataManager:
-    """游戏数据管理器"""
+    """游戏数据管理器，各数据文件在首次访问时才加载"""
 
     _instance = None
-    _data_loaded = False
 
     def __new__(cls):
+        # 只在首次创建时初始化，之后直接返回已有实例，不定义 __init__ 避免重复执行
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
+            instance = super().__new__(cls)
+            instance.base_path = Path(__file__).parent.joinpath("data")
+            cls._instance = instance
         return cls._instance
 
-    def __init__(self):
-        if not self._data_loaded:
-            self._load_data()
-            self._data_loaded = True
+    @cached_property
+    def reply_data(self) -> Dict[str, Any]:
+        """回复文本"""
+        return _compile_templates(self._load_json_file("reply_data.json"))
 
-    def _load_data(self) -> None:
-        """加载所有数据文件"""
-        base_path = Path(__file__).parent.joinpath("data")
+    @cached_property
+    def goods_data(self) -> Dict[str, Any]:
+        """物品数据"""
+        return self._load_json_file("goods_data.json")
 
-        try:
-            self.reply_data = self._load_json_file(
-                base_path.joinpath("reply_data.json")
-            )
-            self.goods_data = self._load_json_file(
-                base_path.joinpath("goods_data.json")
-            )
-            self.check_point = self._load_json_file(
-                base_path.joinpath("check_point.json")
-            )
-            self.monster_data = self._load_json_file(
-                base_path.joinpath("monster_data.json")
-            )
-            logger.info("游戏数据文件加载成功")
-        except Exception as e:
-            logger.exception(f"数据文件加载失败: {e}")
-            self.reply_data = {}
-            self.goods_data = {}
+    @cached_property
+    def check_point(self) -> Dict[str, Any]:
+        """关卡怪物表"""
+        return self._load_json_file("check_point.json")
+
+    @cached_property
+    def monster_data(self) -> Dict[str, Any]:
+        """怪物数据"""
+        return _compile_templates(self._load_json_file("monster_data.json"))
 
-    def _load_json_file(self, file_path: Path) -> Dict[str, Any]:
+    def _load_json_file(self, file_name: str) -> Dict[str, Any]:
         """加载单个JSON文件"""
+        file_path = self.base_path.joinpath(file_name)
         try:
             if file_path.exists():
-                return ujson.loads(file_path.read_text(encoding="utf-8"))
+                data = intern_strings(orjson.loads(file_path.read_bytes()))
+                logger.info(f"数据文件加载成功: {file_name}")
+                return data
             else:
                 logger.warning(f"数据文件不存在: {file_path}")
                 return {}
@@ -62,20 +117,27 @@ class DataManager:
         return self.reply_data.get("event", {}).get(day, "")
 
 
+# 行动到装备部位的映射，只读
+_ACTION2PART = MappingProxyType(
+    intern_strings(
+        {
+            "格斗": "近战",
+            "反击": "近战",
+            "斧": "近战",
+            "剑": "近战",
+            "电锯": "近战",
+            "射击": "远程",
+            "三连射": "远程",
+            "换弹": "远程",
+            "防具": "防具",
+        }
+    )
+)
+
+
 def action2part(action: str) -> str:
     """将行动映射到装备部位"""
-    action_map = {
-        "格斗": "近战",
-        "反击": "近战",
-        "斧": "近战",
-        "剑": "近战",
-        "电锯": "近战",
-        "射击": "远程",
-        "三连射": "远程",
-        "换弹": "远程",
-        "防具": "防具",
-    }
-    return action_map.get(action, "")
+    return _ACTION2PART.get(action, "")
 
 
 data_manager = DataManager()
@@ -1,31 +1,94 @@
-import ujson
+import re
+import time
+import random
+import orjson
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import islice
+from types import MappingProxyType
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Iterator, Mapping, Optional, Tuple, Union
 from loguru import logger
 from peewee import (
     CharField,
     SqliteDatabase,
     Model,
-    DoesNotExist,
     BooleanField,
     IntegerField,
     TextField,
     OperationalError,
     ForeignKeyField,
     AutoField,
+    chunked,
 )
 
 
-from .dice import roll_dice, calculate_damage_bonus
+from .dice import parse_dice, calculate_damage_bonus
 from .GlobalData import data_manager, action2part
 from .Equipment import EquipmentService
 
 
+DB_PATH = Path(__file__).parent.joinpath("inv.db")
+
+# 怪物回合固定可用的行动
+_MONSTER_ACTIONS = ("反击", "闪避")
+
+# WAL 允许读写并发，synchronous=normal 在 WAL 下只在检查点时 fsync
+database = SqliteDatabase(
+    DB_PATH,
+    pragmas={
+        "journal_mode": "wal",
+        "synchronous": "normal",
+        "busy_timeout": 5000,
+        "cache_size": -64000,
+        "temp_store": "memory",
+        # 读取走内存映射，省去 read() 系统调用与额外的页拷贝
+        "mmap_size": 268435456,
+        "foreign_keys": 1,
+    },
+)
+
+
+# 装备数据缺失时的只读占位
+_EMPTY_GOODS: Mapping[str, Any] = MappingProxyType({})
+
+# 技能设置文本按 "技能名 点数" 交替切分
+_SKILL_RE = re.compile(r"[^\d\s]+|\d+")
+
+
+def _dumps_equipped(equipped_data: Dict[str, str]) -> str:
+    """序列化装备栏，orjson 直接输出UTF-8，中文部位名不会被转义"""
+    return orjson.dumps(equipped_data).decode()
+
+
+# 新调查员默认携带并装备的武器（弹簧折刀）
+DEFAULT_WEAPON_ID = "101"
+DEFAULT_EQUIPPED_ITEMS = _dumps_equipped(
+    {EquipmentService.get_equipment_part(DEFAULT_WEAPON_ID): DEFAULT_WEAPON_ID}
+)
+# 新调查员背包中的默认物品行
+DEFAULT_INVENTORY = (
+    {
+        "item_id": DEFAULT_WEAPON_ID,
+        "item_name": EquipmentService.get_equipment_name(DEFAULT_WEAPON_ID),
+        "quantity": 1,
+        "equipped": True,
+    },
+)
+
+
+@lru_cache(maxsize=256)
+def _parse_equipped(equipped_items: str) -> Mapping[str, str]:
+    """解析装备栏JSON，相同文本只解析一次，返回只读映射"""
+    return MappingProxyType(orjson.loads(equipped_items))
+
+
 class BaseModel(Model):
 
     class Meta:
-        db_path = Path(__file__).parent.joinpath("inv.db")
-        database = SqliteDatabase(db_path)
+        database = database
+        # save() 只写入被修改过的字段
+        only_save_dirty = True
 
 
 class Investigator(BaseModel):
@@ -92,6 +155,11 @@ class InventoryItem(BaseModel):
         indexes = ((("investigator", "item_id"), True),)
 
 
+# 调查员字段名在模型定义后即固定，预先生成各字段均为None的空行
+_INVESTIGATOR_FIELDS = tuple(Investigator._meta.fields)
+_EMPTY_INVESTIGATOR_ROW = dict.fromkeys(_INVESTIGATOR_FIELDS)
+
+
 class DatabaseManager:
     """数据库管理器"""
 
@@ -105,22 +173,31 @@ class DatabaseManager:
 
     def _initialize(self):
         """初始化数据库连接和表"""
-        self.db_path = Path(__file__).parent.joinpath("inv.db")
-        self.database = SqliteDatabase(self.db_path)
+        self.db_path = DB_PATH
+        self.database = database
 
         # 定义模型
         self._define_models()
         self._create_tables()
 
+    def connect(self) -> None:
+        """在当前线程打开连接，已打开时直接复用"""
+        self.database.connect(reuse_if_open=True)
+
+    def close(self) -> None:
+        """关闭当前线程的连接，最后一个连接关闭时SQLite会完成WAL检查点"""
+        if not self.database.is_closed():
+            self.database.close()
+
     def _define_models(self):
         """定义数据库模型"""
         self.Investigator = Investigator
         self.InventoryItem = InventoryItem
 
     def _create_tables(self):
-        """创建数据库表"""
+        """创建数据库表；常驻连接由数据库专用线程在启动时打开，这里用完即关"""
         try:
-            self.database.connect()
+            self.connect()
             self.database.create_tables(
                 [self.Investigator, self.InventoryItem], safe=True
             )
@@ -128,8 +205,7 @@ class DatabaseManager:
         except OperationalError as e:
             logger.exception(f"数据库操作失败: {e}")
         finally:
-            if not self.database.is_closed():
-                self.database.close()
+            self.close()
 
 
 class InvestigatorGenerator:
@@ -169,27 +245,39 @@ class InvestigatorGenerator:
         Returns:
             调查员属性列表
         """
-        investigators = []
+        # 属性骰表达式只拆解一次，所有调查员的全部属性骰一次掷出再按顺序分配
+        plan = tuple(
+            (attr_name, *cls._dice_plan(dice_expr), multiplier)
+            for attr_name, (dice_expr, multiplier) in cls.BASE_ATTRIBUTES.items()
+        )
+        dice_per_investigator = sum(dice_count for _, dice_count, _, _ in plan)
+        rolls = iter(random.choices(range(1, 7), k=dice_per_investigator * count))
 
-        for _ in range(count):
-            investigator = cls._generate_single_investigator()
-            investigators.append(investigator)
+        return [cls._generate_single_investigator(rolls, plan) for _ in range(count)]
 
-        return investigators
+    @staticmethod
+    def _dice_plan(dice_expr: str) -> Tuple[int, int]:
+        """将属性骰表达式拆为 (d6数量, 常数加值)，只支持加上的d6与常数项"""
+        dice_count = bonus = 0
+        for operator, value, sides, text in parse_dice(dice_expr):
+            if not sides:
+                bonus += -value if operator == "-" else value
+            elif sides == 6 and operator == "+":
+                dice_count += value
+            else:
+                raise ValueError(f"属性骰只支持加上的d6: {dice_expr} 中的 {text}")
+        return dice_count, bonus
 
     @classmethod
-    def _generate_single_investigator(cls) -> Dict[str, Any]:
-        """生成单个调查员属性"""
-        attributes = {}
-
+    def _generate_single_investigator(
+        cls, rolls: Iterator[int], plan: Tuple[Tuple[str, int, int, int], ...]
+    ) -> Dict[str, Any]:
+        """用预先掷出的d6生成单个调查员属性"""
         # 生成基础属性
-        for attr_name, (dice_expr, multiplier) in cls.BASE_ATTRIBUTES.items():
-            if dice_expr == "2d6+6":
-                roll_result = roll_dice("2d6")[1] + 6
-            else:
-                roll_result = roll_dice(dice_expr)[1]
-
-            attributes[attr_name] = roll_result * multiplier
+        attributes = {
+            attr_name: (sum(islice(rolls, dice_count)) + bonus) * multiplier
+            for attr_name, dice_count, bonus, multiplier in plan
+        }
 
         # 计算衍生属性
         attributes.update(cls._calculate_derived_attributes(attributes))
@@ -227,11 +315,33 @@ class InvestigatorGenerator:
 class InvestigatorService:
     """调查员服务类"""
 
+    # 调查员缓存有效期（秒）
+    CACHE_TTL = 2.0
+    # 调查员缓存最多保留的条目数
+    CACHE_SIZE = 1024
+
     def __init__(self):
         self.db_manager = DatabaseManager()
         self.data_manager = data_manager
         self.Investigator = self.db_manager.Investigator
         self.InventoryItem = self.db_manager.InventoryItem
+        # 按最近使用顺序排列，超出容量时淘汰最久未用的条目
+        self._investigator_cache: "OrderedDict[str, Tuple[float, Investigator]]" = (
+            OrderedDict()
+        )
+        # 以装备JSON文本为键缓存可用行动，装备变化时键随之改变
+        self._actions_cache: Dict[str, Mapping[str, Tuple[str, ...]]] = {}
+
+    def _invalidate_cache(self, qq: Optional[str] = None) -> None:
+        """使调查员缓存失效，不传qq时清空全部缓存"""
+        if qq is None:
+            self._investigator_cache.clear()
+        else:
+            self._investigator_cache.pop(qq, None)
+
+    def transaction(self):
+        """合并多次写入的事务，嵌套的 atomic() 会成为保存点"""
+        return self.db_manager.database.atomic()
 
     def ensure_investigator_exists(self, qq: str, name: str = "调查员") -> bool:
         """
@@ -244,6 +354,12 @@ class InvestigatorService:
         Returns:
             是否成功确保调查员存在
         """
+        return self._get_or_create_investigator(qq, name) is not None
+
+    def _get_or_create_investigator(
+        self, qq: str, name: str = "调查员"
+    ) -> Optional[Investigator]:
+        """获取调查员，不存在则创建，失败时返回None"""
         try:
             with self.db_manager.database.atomic():
                 investigator, created = self.Investigator.get_or_create(
@@ -254,10 +370,10 @@ class InvestigatorService:
                     logger.info(f"已创建新调查员: {name} (QQ: {qq})")
                     # 创建默认装备
                     self._create_default_equipment(investigator)
-                return True
+                return investigator
         except Exception as e:
             logger.exception(f"确保调查员存在失败: QQ={qq}, Error={e}")
-            return False
+            return None
 
     def _get_default_investigator_data(self) -> Dict[str, Any]:
         """获取默认调查员数据"""
@@ -273,30 +389,17 @@ class InvestigatorService:
             "isadventure": False,
             "day": 1,
             "san": 99,
-            "equipped_items": "{}",
+            "equipped_items": DEFAULT_EQUIPPED_ITEMS,
             "current_armor": "",
         }
 
     def _create_default_equipment(self, investigator) -> None:
-        """创建默认装备"""
+        """创建默认装备，装备栏在创建调查员时已经写入"""
         try:
-            # 添加默认武器（弹簧折刀）
-            default_weapon_data = {
-                "item_id": "101",
-                "item_name": "弹簧折刀",
-                "quantity": 1,
-                "equipped": True,
-            }
-
-            self.InventoryItem.create(investigator=investigator, **default_weapon_data)
-
-            # 更新装备信息
-            equipped_data = {"近战": "101"}
-            investigator.equipped_items = ujson.dumps(
-                equipped_data,
-                ensure_ascii=False,
-            )
-            investigator.save()
+            # 直接插入行数据，无需构造模型实例
+            self.InventoryItem.insert_many(
+                [{**item, "investigator": investigator} for item in DEFAULT_INVENTORY]
+            ).execute()
 
         except Exception as e:
             logger.exception(f"创建默认装备失败: {e}")
@@ -322,25 +425,18 @@ class InvestigatorService:
                 ]
             else:
                 investigator_data = data
+            self._invalidate_cache(qq)
             with self.db_manager.database.atomic():
                 # 删除已存在的调查员
-                investigator = (
-                    self.Investigator.select().where(self.Investigator.qq == qq).first()
-                )
-
-                if not investigator:
+                if not self._delete_investigator_rows(qq):
                     logger.warning(f"未找到要删除的调查员: {qq}")
                     return False
 
-                # 删除相关的库存物品
-                self.InventoryItem.delete().where(
-                    self.InventoryItem.investigator == investigator
-                ).execute()
-                investigator.delete_instance()
-
                 # 创建新调查员
                 investigator = self.Investigator.create(
-                    qq=qq, name=name, **investigator_data
+                    qq=qq,
+                    name=name,
+                    **{**investigator_data, "equipped_items": DEFAULT_EQUIPPED_ITEMS},
                 )
 
                 # 创建默认装备
@@ -353,6 +449,68 @@ class InvestigatorService:
             logger.exception(f"创建新调查员失败: QQ={qq}, Error={e}")
             return False
 
+    def _delete_investigator_rows(self, qq: str) -> int:
+        """按qq删除调查员及其背包，不先查出行数据，返回删除的调查员数"""
+        investigator_id = self.Investigator.select(self.Investigator.id).where(
+            self.Investigator.qq == qq
+        )
+        # 先删除背包物品
+        self.InventoryItem.delete().where(
+            self.InventoryItem.investigator.in_(investigator_id)
+        ).execute()
+        # 再删除调查员
+        return self.Investigator.delete().where(self.Investigator.qq == qq).execute()
+
+    def bulk_create_investigators(self, records: List[Dict[str, Any]]) -> int:
+        """
+        批量创建调查员，用于批量导入等一次写入多名调查员的场景，
+        与 create_new_investigator 一样为每名调查员装备并放入默认物品
+
+        Args:
+            records: 调查员数据列表，每项需包含qq
+
+        Returns:
+            创建的调查员数量
+        """
+        fields = self.Investigator._meta.fields
+        rows = [
+            {
+                **{k: v for k, v in record.items() if k in fields},
+                "equipped_items": DEFAULT_EQUIPPED_ITEMS,
+            }
+            for record in records
+        ]
+        qqs = [row["qq"] for row in rows]
+        try:
+            with self.db_manager.database.atomic():
+                # 分批插入，每批的参数总数不超过SQLite旧版本的999个上限
+                for batch in chunked(rows, max(1, 999 // len(fields))):
+                    self.Investigator.insert_many(batch).execute()
+
+                # 按qq取回新调查员的id，写入默认背包物品
+                inventory_rows = []
+                for batch in chunked(qqs, 999):
+                    ids = (
+                        self.Investigator.select(self.Investigator.id)
+                        .where(self.Investigator.qq.in_(batch))
+                        .tuples()
+                    )
+                    inventory_rows.extend(
+                        {**item, "investigator": investigator_id}
+                        for (investigator_id,) in ids
+                        for item in DEFAULT_INVENTORY
+                    )
+                item_columns = len(self.InventoryItem._meta.fields)
+                for batch in chunked(inventory_rows, 999 // item_columns):
+                    self.InventoryItem.insert_many(batch).execute()
+            for qq in qqs:
+                self._invalidate_cache(qq)
+            logger.info(f"批量创建调查员成功: 数量={len(rows)}")
+            return len(rows)
+        except Exception as e:
+            logger.exception(f"批量创建调查员失败: Error={e}")
+            return 0
+
     def get_investigator(self, qq: str) -> Optional[Investigator]:
         """
         获取调查员信息
@@ -363,16 +521,19 @@ class InvestigatorService:
         Returns:
             调查员对象或None
         """
-        try:
-            if self.ensure_investigator_exists(qq):
-                return self.Investigator.get(self.Investigator.qq == qq)
-            return None
-        except DoesNotExist:
-            logger.warning(f"调查员不存在: {qq}")
-            return None
-        except Exception as e:
-            logger.exception(f"获取调查员失败: QQ={qq}, Error={e}")
-            return None
+        cache = self._investigator_cache
+        cached = cache.get(qq)
+        if cached and time.monotonic() - cached[0] < self.CACHE_TTL:
+            cache.move_to_end(qq)
+            return cached[1]
+        # get_or_create 已经返回了行数据，无需再查询一次
+        investigator = self._get_or_create_investigator(qq)
+        if investigator:
+            cache[qq] = (time.monotonic(), investigator)
+            cache.move_to_end(qq)
+            if len(cache) > self.CACHE_SIZE:
+                cache.popitem(last=False)
+        return investigator
 
     def get_investigator_dict(self, qq: str) -> Optional[Dict[str, Any]]:
         """
@@ -391,6 +552,9 @@ class InvestigatorService:
 
     def _model_to_dict(self, model_instance) -> Dict[str, Any]:
         """将模型实例转换为字典"""
+        if isinstance(model_instance, Investigator):
+            # __data__ 即已加载的列值，合并到空行上保证字段齐全且顺序不变
+            return {**_EMPTY_INVESTIGATOR_ROW, **model_instance.__data__}
         data = {}
         for field_name in model_instance._meta.fields.keys():
             data[field_name] = getattr(model_instance, field_name)
@@ -408,6 +572,12 @@ class InvestigatorService:
             是否更新成功
         """
         try:
+            fields = self.Investigator._meta.fields
+            # 只保留模型中存在的字段，生成单条 UPDATE
+            rejected = [k for k in attributes if k not in fields]
+            if rejected:
+                logger.warning(f"忽略调查员不存在的字段: QQ={qq}, 字段={rejected}")
+                attributes = {k: v for k, v in attributes.items() if k in fields}
             with self.db_manager.database.atomic():
 
                 if attributes:
@@ -415,7 +585,7 @@ class InvestigatorService:
                         self.Investigator.qq == qq
                     )
                     res = query.execute()
-                    print(query)
+                    self._invalidate_cache(qq)
                     if res:
                         logger.info(f"更新调查员属性成功: QQ={qq}, 属性={attributes}")
                         return True
@@ -480,36 +650,23 @@ class InvestigatorService:
             if not investigator:
                 return False
 
-            with self.db_manager.database.atomic():
-                # 检查是否已存在该物品
-                existing_item = (
-                    self.InventoryItem.select()
-                    .where(
-                        (self.InventoryItem.investigator == investigator)
-                        & (self.InventoryItem.item_id == item_id)
-                    )
-                    .first()
-                )
-                item_name = EquipmentService.get_equipment_name(item_id)
-                if existing_item:
-                    # 更新数量
-                    existing_item.quantity += quantity
-                    existing_item.save()
-                else:
-                    # 创建新物品
-
-                    self.InventoryItem.create(
-                        investigator=investigator,
-                        item_id=item_id,
-                        item_name=item_name,
-                        quantity=quantity,
-                        ensure_ascii=False,
-                    )
-
-                logger.info(
-                    f"添加物品到背包成功: QQ={qq}, 物品={item_name}, 数量={quantity}"
-                )
-                return True
+            item_name = EquipmentService.get_equipment_name(item_id)
+            # 已有该物品则累加数量，依赖 (investigator, item_id) 唯一索引一条语句完成
+            item_model = self.InventoryItem
+            item_model.insert(
+                investigator=investigator,
+                item_id=item_id,
+                item_name=item_name,
+                quantity=quantity,
+            ).on_conflict(
+                conflict_target=[item_model.investigator, item_model.item_id],
+                update={item_model.quantity: item_model.quantity + quantity},
+            ).execute()
+
+            logger.info(
+                f"添加物品到背包成功: QQ={qq}, 物品={item_name}, 数量={quantity}"
+            )
+            return True
 
         except Exception as e:
             logger.exception(f"添加物品到背包失败: QQ={qq}, Error={e}")
@@ -535,24 +692,21 @@ class InvestigatorService:
                 return False
 
             with self.db_manager.database.atomic():
-                item = (
-                    self.InventoryItem.select()
-                    .where(
-                        (self.InventoryItem.investigator == investigator)
-                        & (self.InventoryItem.item_id == item_id)
+                condition = (self.InventoryItem.investigator == investigator) & (
+                    self.InventoryItem.item_id == item_id
+                )
+                # 数量足够时直接减少，否则整行删除
+                changed = (
+                    self.InventoryItem.update(
+                        quantity=self.InventoryItem.quantity - quantity
                     )
-                    .first()
+                    .where(condition & (self.InventoryItem.quantity > quantity))
+                    .execute()
                 )
+                if not changed:
+                    changed = self.InventoryItem.delete().where(condition).execute()
 
-                if item:
-                    if item.quantity <= quantity:
-                        # 完全移除
-                        item.delete_instance()
-                    else:
-                        # 减少数量
-                        item.quantity -= quantity
-                        item.save()
-
+                if changed:
                     logger.info(
                         f"从背包移除物品成功: QQ={qq}, 物品ID={item_id}, 数量={quantity}"
                     )
@@ -597,17 +751,15 @@ class InvestigatorService:
             part = EquipmentService.get_equipment_part(item_id)
             with self.db_manager.database.atomic():
                 # 更新装备信息
-                equipped_data = ujson.loads(investigator.equipped_items)
+                equipped_data = dict(_parse_equipped(investigator.equipped_items))
                 equipped_data[part] = item_id
-                investigator.equipped_items = ujson.dumps(
-                    equipped_data,
-                    ensure_ascii=False,
-                )
+                investigator.equipped_items = _dumps_equipped(equipped_data)
                 investigator.save()
 
-                # 标记物品为已装备
-                item.equipped = True
-                item.save()
+                # 标记物品为已装备，已装备的物品无需再写一次
+                if not item.equipped:
+                    item.equipped = True
+                    item.save()
 
                 logger.info(
                     f"装备物品成功: QQ={qq}, 物品={item.item_name}, 部位={part}"
@@ -615,6 +767,8 @@ class InvestigatorService:
                 return True, f"装备物品成功,装备:{item.item_name}, 部位:{part}"
 
         except Exception as e:
+            # 缓存中的实例可能已被改动却未写入，丢弃它以免下次保存时带上
+            self._invalidate_cache(qq)
             logger.exception(f"装备物品失败: QQ={qq}, Error={e}")
             return False, "装备物品失败"
 
@@ -637,7 +791,7 @@ class InvestigatorService:
             investigator = self.get_investigator(qq)
             if not investigator:
                 return None
-            equipped_data = ujson.loads(investigator.equipped_items)
+            equipped_data = _parse_equipped(investigator.equipped_items)
             item_id: str = equipped_data.get(part, "")
             return item_id
 
@@ -658,13 +812,13 @@ class InvestigatorService:
             是否破坏成功
         """
         part = action2part(action)
-        logger.info(part)
+        logger.debug(part)
         try:
             investigator = self.get_investigator(qq)
             if not investigator:
                 return False
 
-            equipped_data = ujson.loads(investigator.equipped_items)
+            equipped_data = dict(_parse_equipped(investigator.equipped_items))
 
             item_id = equipped_data.get(part, "")
 
@@ -676,43 +830,49 @@ class InvestigatorService:
             if not item_data.get("breakable", True):
                 logger.info(f"物品不可破坏: QQ={qq}, 部位={part}, 物品ID={item_id}")
                 return False
-            self.remove_item_from_inventory(qq, item_id)
-            # 更新装备信息
-            logger.info([item_id, item_data, equipped_data])
-            equipped_data.pop(part, None)
-            investigator.equipped_items = ujson.dumps(
-                equipped_data,
-                ensure_ascii=False,
-            )
-            investigator.save()
+            # 移除物品与更新装备栏在同一事务内提交，移除失败时抛出异常让事务回滚
+            with self.transaction():
+                if not self.remove_item_from_inventory(qq, item_id):
+                    raise RuntimeError(f"移除背包物品失败: 物品ID={item_id}")
+                # 更新装备信息
+                logger.debug([item_id, item_data, equipped_data])
+                equipped_data.pop(part, None)
+                investigator.equipped_items = _dumps_equipped(equipped_data)
+                investigator.save()
 
             logger.info(f"破坏装备物品成功: QQ={qq}, 部位={part}")
             return True
 
         except Exception as e:
+            # 缓存中的实例可能已被改动却未写入，丢弃它以免下次保存时带上
+            self._invalidate_cache(qq)
             logger.exception(f"破坏装备物品失败: QQ={qq}, 部位={part}, Error={e}")
             return False
 
-    def get_available_actions(self, qq: str) -> Dict[str, List[str]]:
-        """获取可用的行动字典"""
+    def get_available_actions(self, qq: str) -> Mapping[str, Tuple[str, ...]]:
+        """获取可用的行动字典，返回值为共享缓存的只读视图"""
         try:
             investigator = self.get_investigator(qq)
             if not investigator:
-                return {"inv": [], "mon": ["反击", "闪避"]}
+                return {"inv": (), "mon": _MONSTER_ACTIONS}
 
-            equipped_data = ujson.loads(investigator.equipped_items)
+            cached = self._actions_cache.get(investigator.equipped_items)
+            if cached is not None:
+                return cached
+
+            goods_get = self.data_manager.goods_data.get
             player_actions = []
-            for part, item_id in equipped_data.items():
-                equipment_data = self.data_manager.goods_data.get(item_id)
-                if equipment_data:
-                    actions = equipment_data.get("skill", [])
-                    if actions:
-                        player_actions.extend(actions)
-
-            return {"inv": player_actions, "mon": ["反击", "闪避"]}
+            for item_id in _parse_equipped(investigator.equipped_items).values():
+                player_actions.extend(goods_get(item_id, _EMPTY_GOODS).get("skill", ()))
+
+            result = MappingProxyType(
+                {"inv": tuple(player_actions), "mon": _MONSTER_ACTIONS}
+            )
+            self._actions_cache[investigator.equipped_items] = result
+            return result
         except Exception as e:
             logger.exception(f"获取行动字典失败: QQ={qq}, Error={e}")
-            return {"inv": [], "mon": ["反击", "闪避"]}
+            return {"inv": (), "mon": _MONSTER_ACTIONS}
 
     # 原有功能的兼容方法
     def get_adventure_status(self, qq: str) -> Optional[bool]:
@@ -740,11 +900,13 @@ class InvestigatorService:
     def reset_all_adventure_status(self) -> bool:
         """重置所有冒险状态"""
         try:
-            with self.db_manager.database.atomic():
+            # 批量写入，开始事务时就获取写锁，避免中途升级锁时与读者冲突
+            with self.db_manager.database.atomic(lock_type="IMMEDIATE"):
                 query = self.Investigator.update(isadventure=False).where(
                     self.Investigator.isadventure == True
                 )
                 affected_rows = query.execute()
+                self._invalidate_cache()
                 logger.info(f"重置冒险状态完成，影响 {affected_rows} 个调查员")
                 return True
         except Exception as e:
@@ -755,13 +917,8 @@ class InvestigatorService:
         """删除调查员"""
         try:
             with self.db_manager.database.atomic():
-                # 先删除背包物品
-                self.InventoryItem.delete().where(
-                    self.InventoryItem.investigator.qq == qq
-                ).execute()
-                # 再删除调查员
-                query = self.Investigator.delete().where(self.Investigator.qq == qq)
-                deleted_count = query.execute()
+                deleted_count = self._delete_investigator_rows(qq)
+                self._invalidate_cache(qq)
 
                 if deleted_count > 0:
                     logger.info(f"删除调查员成功: {qq}")
@@ -774,41 +931,50 @@ class InvestigatorService:
             logger.exception(f"删除调查员失败: QQ={qq}, Error={e}")
             return False
 
-    def get_armor(self, qq: str) -> str:
-        """获取当前护甲"""
-        investigator = self.get_equipped_id(qq, "防具")
-        if not investigator:
-            return "0"
-        equipment_data = data_manager.goods_data.get(investigator)
-        return equipment_data.get("armor", "0") if equipment_data else "0"
+    def get_armor(self, qq: str) -> int:
+        """获取当前护甲值"""
+        item_id = self.get_equipped_id(qq, "防具")
+        if not item_id:
+            return 0
+        return EquipmentService.get_equipment(item_id).armor
 
     def get_equipments(self, qq: str) -> Dict[str, str]:
         """获取已有的装备"""
         investigator = self.get_investigator(qq)
         if not investigator:
             return {}
-        items: list[InventoryItem] = self.InventoryItem.select().where(
-            self.InventoryItem.investigator == investigator
+        return self._collect_equipments(investigator)
+
+    def _collect_equipments(self, investigator: Investigator) -> Dict[str, Any]:
+        """一次查询取出调查员的全部背包物品，只取所需三列并以元组返回"""
+        item_model = self.InventoryItem
+        rows = (
+            item_model.select(
+                item_model.item_id, item_model.item_name, item_model.quantity
+            )
+            .where(item_model.investigator == investigator)
+            .tuples()
         )
-        detial_info = {}
-        for inventoryItem in items:
-            detial_info[inventoryItem.item_id] = {
-                inventoryItem.item_name: inventoryItem.quantity
-            }
-        return detial_info
+        return {item_id: {item_name: quantity} for item_id, item_name, quantity in rows}
 
     def str_equipments(self, qq: str) -> str:
         """获取已有的装备"""
-        equipments = self.get_equipments(qq)
         investigator = self.get_investigator(qq)
-        equipped_data = ujson.loads(investigator.equipped_items)
+        if not investigator:
+            return ""
+        equipments = self._collect_equipments(investigator)
+        equipped_data = _parse_equipped(investigator.equipped_items)
         all_equipments = EquipmentService.brief_equipment(equipments)
-        res = "已装备：\n"
-        for key, value in equipped_data.items():
-            res += f"{key}：{equipments.get(value)}\n"
+        res = "已装备：\n" + "".join(
+            f"{key}：{equipments.get(value)}\n" for key, value in equipped_data.items()
+        )
         return all_equipments + res
 
 
+# 展示调查员属性时不输出的数据库字段
+_FORMAT_EXCLUDED_KEYS = frozenset(("id", "equipped_items", "current_armor"))
+
+
 class InvestigatorFormatter:
     """调查员格式化器"""
 
@@ -835,6 +1001,15 @@ class InvestigatorFormatter:
                 name, investigator_data
             )
 
+    @staticmethod
+    def _public_items(investigator: Dict[str, Any]) -> List[Tuple[str, Any]]:
+        """过滤掉数据库专用字段"""
+        return [
+            (k, v)
+            for k, v in investigator.items()
+            if k[:1] != "_" and k not in _FORMAT_EXCLUDED_KEYS
+        ]
+
     @staticmethod
     def _format_investigator_list(
         name: str, investigators: List[Dict[str, Any]]
@@ -844,15 +1019,9 @@ class InvestigatorFormatter:
         body_lines = []
 
         for investigator in investigators:
-            # 过滤掉数据库专用字段
-            filtered_data = {
-                k: v
-                for k, v in investigator.items()
-                if not k.startswith("_")
-                and k not in ["id", "equipped_items", "current_armor"]
-            }
             attributes = " ".join(
-                f"{key}:{value}" for key, value in filtered_data.items()
+                f"{key}:{value}"
+                for key, value in InvestigatorFormatter._public_items(investigator)
             )
             body_lines.append(attributes)
 
@@ -863,34 +1032,32 @@ class InvestigatorFormatter:
         """格式化单个调查员"""
         header = f"{name}的角色属性为:\n"
         body_lines = []
-        current_line = ""
+        # 当前行的属性及其总长度（每项计入一个分隔空格），换行时以空格拼接
+        current_parts = []
+        current_len = 0
 
-        # 过滤掉数据库专用字段
-        filtered_data = {
-            k: v
-            for k, v in investigator.items()
-            if not k.startswith("_")
-            and k not in ["id", "equipped_items", "current_armor"]
-        }
-
-        for key, value in filtered_data.items():
-            attribute = f"{key}:{value} "
+        for key, value in InvestigatorFormatter._public_items(investigator):
+            attribute = f"{key}:{value}"
+            width = len(attribute) + 1
 
             # 如果添加这个属性会使行太长，开始新行
-            if len(current_line) + len(attribute) > 60:
-                body_lines.append(current_line.strip())
-                current_line = attribute
+            if current_len + width > 60:
+                body_lines.append(" ".join(current_parts))
+                current_parts = [attribute]
+                current_len = width
             else:
-                current_line += attribute
+                current_parts.append(attribute)
+                current_len += width
 
             # 总点数后换行
             if key == "总点数":
-                body_lines.append(current_line.strip())
-                current_line = ""
+                body_lines.append(" ".join(current_parts))
+                current_parts = []
+                current_len = 0
 
         # 添加剩余内容
-        if current_line:
-            body_lines.append(current_line.strip())
+        if current_parts:
+            body_lines.append(" ".join(current_parts))
 
         return header + "\n".join(body_lines)
 
@@ -911,11 +1078,8 @@ class CreateInvestigator:
 
     def set_skill(self, skills: str):
         """设置技能服务实例"""
-        import re
-
-        pattern = re.compile(r"[^\d\s]+|\d+")
-        match = pattern.findall(skills)
-        if not str.isdigit(match[-1]):  # 最后一位不是数字出现错误
+        match = _SKILL_RE.findall(skills)
+        if not match[-1].isdigit():  # 最后一位不是数字出现错误
             return False, "技能设置错误了哦~"
         a = iter(match)
         match_dic = dict(zip(a, a))
@@ -927,16 +1091,15 @@ class CreateInvestigator:
             return False, "当前总点数过多了哦~"
         if tol < skill_point:
             return False, "当前总点数过少了哦~"
-        user_select_tmp = self.select.copy()
-        for key in match_dic:
-            if key in user_select_tmp:
-                user_select_tmp[key] += match_dic[key]
-                if user_select_tmp[key] > 75:
-                    return False, f"当前技能{key}点数高于了75哦~"
-            else:
+        # 先全部校验，通过后再修改，无需复制整份属性
+        select = self.select
+        for key, delta in match_dic.items():
+            if key not in select:
                 return False, f"不存在技能{key}~"
-        user_select = user_select_tmp
-        self.select.update(user_select)
+            if select[key] + delta > 75:
+                return False, f"当前技能{key}点数高于了75哦~"
+        for key, delta in match_dic.items():
+            select[key] += delta
         return True, "技能设置成功啦~"
 
     def create_investigator(self, qq: str, name: str = "调查员"):
@@ -40,6 +40,8 @@ class Monster:
         self.data = data_manager.monster_data.get(mon_id, {})
         self.hp = self.data.get("生命值", 0)
         self.armor = self.data.get("装甲", "无")
+        # 攻击方式只在创建时整理一次
+        self.attacks = tuple(self.data.get("攻击", {}).values())
 
     def __getattribute__(self, name: str):
         """获取怪物属性"""
@@ -50,10 +52,7 @@ class Monster:
 
     def get_action(self, turn: str) -> dict:
         """获取怪物的行动"""
-        if turn == "inv":
-            return self.data["攻击"][choice(list(self.data["攻击"]))]
-        else:
-            return self.data["攻击"][choice(list(self.data["攻击"]))]
+        return choice(self.attacks)
 
     def get_reward(self):
         """获取怪物的奖励"""
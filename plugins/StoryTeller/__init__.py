@@ -1,9 +1,11 @@
 import os
 import asyncio
 import re
-from typing import Union, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Union, Dict, Any, Callable, TypeVar
 from nonebot_plugin_alconna import funcommand
-from nonebot import on_command, on_regex, on_message
+from nonebot import get_driver, on_command, on_regex, on_message
 from nonebot.params import CommandArg, RegexGroup, EventMessage
 from loguru import logger
 from nonebot.adapters import Event, Message
@@ -63,6 +65,34 @@ set_skill_cmd = on_alconna(Alconna("/st", Args["skill", str]))
 user_states: Dict[str, Any] = {}
 print("start")
 
+T = TypeVar("T")
+
+# 数据库操作是同步阻塞的，全部交给同一个专用线程串行执行。
+# peewee 的连接按线程持有，这样所有查询都复用该线程上的常驻连接
+_db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storyteller-db")
+
+
+async def run_db(func: Callable[..., T], *args: Any) -> T:
+    """在数据库专用线程中执行同步调用"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, partial(func, *args))
+
+
+driver = get_driver()
+
+
+@driver.on_startup
+async def _open_database():
+    """启动时在数据库线程上打开常驻连接"""
+    await run_db(investigator_service.db_manager.connect)
+
+
+@driver.on_shutdown
+async def _close_database():
+    """关闭数据库线程上的连接以完成WAL检查点，再结束该线程"""
+    await run_db(investigator_service.db_manager.close)
+    _db_executor.shutdown(wait=True)
+
 
 @check_equipments_cmd.handle()
 async def handle_check_equipments(
@@ -84,7 +114,7 @@ async def handle_change_equipments(
     else:
         qq = str(event.get_user_id())
     item_id = matched_item_id.result
-    res = investigator_service.equip_item(qq, str(item_id))
+    res = await run_db(investigator_service.equip_item, qq, str(item_id))
     await change_equipments_cmd.finish(res[1])
 
 
@@ -95,7 +125,9 @@ async def handle_equipments(event: Event):
         qq = "console_user"
     else:
         qq = str(event.get_user_id())
-    equipments = "\n已有装备：\n" + investigator_service.str_equipments(qq)
+    equipments = "\n已有装备：\n" + await run_db(
+        investigator_service.str_equipments, qq
+    )
     await investigator_equipments_cmd.finish(equipments)
 
 
@@ -115,7 +147,7 @@ async def handle_adventure(event: Event):
     #     await adventure_cmd.finish(res[1])
 
     # 获取调查员信息
-    inv_info = investigator_service.get_investigator(qq)
+    inv_info = await run_db(investigator_service.get_investigator, qq)
     if not inv_info:
         await adventure_cmd.finish("调查员信息获取失败，请稍后再试~")
 
@@ -123,7 +155,7 @@ async def handle_adventure(event: Event):
     name = "调查员"  # 这里需要根据实际情况获取用户名
 
     adventure = Adventure(qq, name)
-    monster, replies = adventure.StartAdventure()
+    monster, replies = await run_db(adventure.StartAdventure)
 
     # 获取当日事件
     day_event = data_manager.get_event(str(inv_info.day))
@@ -153,7 +185,7 @@ async def handle_fight(event: Event, action: Match[str] = AlconnaMatch("action")
     adventure = user_states[qq]["adventure"]
 
     # 执行战斗动作
-    flag, res = adventure.run_adventure(action.result)
+    flag, res = await run_db(adventure.run_adventure, action.result)
 
     if flag:
         # 战斗结束
@@ -175,12 +207,9 @@ async def handle_create_investigator(event: Event):
         qq = str(event.get_user_id())
 
     # 检查是否已存在调查员
-    res = check_issurvive(qq)
-    hp = (
-        investigator_service.get_investigator(qq).hp
-        if investigator_service.get_investigator(qq)
-        else 0
-    )
+    res = await run_db(check_issurvive, qq)
+    investigator = await run_db(investigator_service.get_investigator, qq)
+    hp = investigator.hp if investigator else 0
 
     if res[0] and hp > 0:
         pass
@@ -260,7 +289,7 @@ async def handle_set_skill(
         await set_skill_cmd.finish(reply)
 
     # 创建调查员
-    flag, reply = creator.create_investigator(qq, name)
+    flag, reply = await run_db(creator.create_investigator, qq, name)
     attr = InvestigatorFormatter.format_investigator_info(name, creator.select)
 
     # 清除创建状态
@@ -280,12 +309,12 @@ async def handle_investigator_info(event: Event):
         qq = str(event.get_user_id())
 
     # 检查调查员状态
-    res = check_issurvive(qq)
+    res = await run_db(check_issurvive, qq)
     if not res[0]:
         await investigator_info_cmd.finish(res[1])
 
     # 获取调查员信息
-    inv_info = investigator_service.get_investigator_dict(qq)
+    inv_info = await run_db(investigator_service.get_investigator_dict, qq)
     if not inv_info:
         await investigator_info_cmd.finish("调查员信息获取失败，请稍后再试~")
 
@@ -1,4 +1,6 @@
-from typing import Union, Tuple, Dict, Any, Optional
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Union, Tuple, Dict, Any, Optional, List
 import random
 
 
@@ -16,9 +18,9 @@ class SuccessLevel:
 class DiceRoll:
     """基础骰子类"""
 
-    def __init__(self, skill: int):
+    def __init__(self, skill: int, dice: Optional[int] = None):
         self.skill = skill
-        self.dice = self._roll_d100()
+        self.dice = self._roll_d100() if dice is None else dice
         self.level = self._calculate_success_level(skill, self.dice)
 
     def _roll_d100(self) -> int:
@@ -131,25 +133,71 @@ class BonusDiceRoll(DiceRoll):
 class PenaltyDiceRoll(DiceRoll):
     """惩罚骰类"""
 
-    def __init__(self, skill: int, penalty_dice: int = 1):
+    def __init__(
+        self,
+        skill: int,
+        penalty_dice: int = 1,
+        dice: Optional[int] = None,
+        penalty_values: Optional[List[int]] = None,
+    ):
         self.penalty_dice_count = penalty_dice
-        super().__init__(skill)
-        self._apply_penalty_dice()
+        super().__init__(skill, dice)
+        self._apply_penalty_dice(penalty_values)
         self.level = self._calculate_success_level(skill, self.final_result)
 
-    def _apply_penalty_dice(self):
-        """应用惩罚骰"""
+    @classmethod
+    def roll_many(
+        cls, skill: int, count: int, penalty_dice: int = 1
+    ) -> List["PenaltyDiceRoll"]:
+        """
+        一次进行多次惩罚骰鉴定
+
+        所有d100与惩罚骰各用一次调用掷出，用于连射等连续鉴定
+
+        Args:
+            skill: 技能值
+            count: 鉴定次数
+            penalty_dice: 每次鉴定的惩罚骰数量
+
+        Returns:
+            鉴定结果列表
+        """
+        d100_rolls = random.choices(range(1, 101), k=count)
+        penalty_values = random.choices(range(10), k=count * penalty_dice)
+
+        return [
+            cls(
+                skill,
+                penalty_dice,
+                dice=dice,
+                penalty_values=penalty_values[
+                    index * penalty_dice : (index + 1) * penalty_dice
+                ],
+            )
+            for index, dice in enumerate(d100_rolls)
+        ]
+
+    def _apply_penalty_dice(self, penalty_values: Optional[List[int]] = None):
+        """应用惩罚骰，可传入已经掷好的惩罚骰点数"""
         self.penalty_rolls = []
         self.final_result = self.dice
 
-        for _ in range(self.penalty_dice_count):
-            penalty_roll, penalty_value = self._roll_penalty_dice()
+        if penalty_values is None:
+            penalty_values = [
+                random.randint(0, 9) for _ in range(self.penalty_dice_count)
+            ]
+
+        for value in penalty_values:
+            penalty_roll, penalty_value = self._roll_penalty_dice(value)
             self.penalty_rolls.append(penalty_value)
             self.final_result = max(penalty_roll, self.final_result)
 
-    def _roll_penalty_dice(self) -> Tuple[int, int]:
+    def _roll_penalty_dice(
+        self, penalty_value: Optional[int] = None
+    ) -> Tuple[int, int]:
         """掷单个惩罚骰"""
-        penalty_value = random.randint(0, 9)
+        if penalty_value is None:
+            penalty_value = random.randint(0, 9)
         result = self.dice
 
         if result // 10 < penalty_value:
@@ -158,17 +206,20 @@ class PenaltyDiceRoll(DiceRoll):
         return result, penalty_value
 
 
+# 按成功等级排列的描述，下标为 等级+1
+_LEVEL_DESC = ("大失败", "失败", "成功", "困难成功", "极难成功", "大成功")
+
+
 def get_success_description(rank: int) -> str:
     """获取成功等级描述"""
-    success_descriptions = {
-        SuccessLevel.CRITICAL_FAILURE: "大失败",
-        SuccessLevel.FAILURE: "失败",
-        SuccessLevel.SUCCESS: "成功",
-        SuccessLevel.HARD_SUCCESS: "困难成功",
-        SuccessLevel.EXTREME_SUCCESS: "极难成功",
-        SuccessLevel.CRITICAL_SUCCESS: "大成功",
-    }
-    return success_descriptions.get(rank, "未知")
+    if SuccessLevel.CRITICAL_FAILURE <= rank <= SuccessLevel.CRITICAL_SUCCESS:
+        return _LEVEL_DESC[rank + 1]
+    return "未知"
+
+
+# 伤害加值的分段上界（不含）与对应加值
+_DB_THRESHOLDS = (65, 85, 125, 165, 205)
+_DB_BONUSES = ("-2", "-1", "0", "1d4", "1d6")
 
 
 def calculate_damage_bonus(size: int, strength: int) -> str:
@@ -184,63 +235,27 @@ def calculate_damage_bonus(size: int, strength: int) -> str:
     """
     total = size + strength
 
-    # 使用字典映射范围判断，提高可读性
-    bonus_ranges = [(65, "-2"), (85, "-1"), (125, "0"), (165, "1d4"), (205, "1d6")]
-
-    for threshold, bonus in bonus_ranges:
-        if total < threshold:
-            return bonus
+    index = bisect_right(_DB_THRESHOLDS, total)
+    if index < len(_DB_BONUSES):
+        return _DB_BONUSES[index]
 
     # 超过205的情况
     additional_dice = (total - 205) // 80 + 2
     return f"{additional_dice}d6"
 
 
-def roll_dice(
-    dice_expression: str, use_max: Union[bool, int] = False
-) -> Tuple[str, int]:
+@lru_cache(maxsize=512)
+def parse_dice(dice_expression: str) -> Tuple[Tuple[str, int, int, str], ...]:
     """
-    解析并执行掷骰表达式
+    解析掷骰表达式，相同表达式只解析一次
 
     Args:
         dice_expression: 掷骰表达式 (如 "3d6+1-1")
-        use_max: 是否使用最大骰值，True时取满值
 
     Returns:
-        tuple: (详细掷骰过程字符串, 总结果)
+        各项组成的元组，每项为 (运算符, 骰子数量或常数值, 骰子面数, 原始文本)，
+        常数项的骰子面数为0
     """
-
-    def roll_single_dice(part: str) -> Tuple[int, str]:
-        """处理单个骰子表达式或数字"""
-        part = part.strip()
-
-        # 处理骰子表达式 (如 "3d6", "d4", "2d4")
-        if "d" in part:
-            # 处理省略了前面数字的情况 (如 "d4" 应该等于 "1d4")
-            if part.startswith("d"):
-                count = 1
-                sides = int(part[1:])
-            else:
-                count, sides = map(int, part.split("d"))
-
-            if use_max:
-                rolls = [sides] * count
-                detail = " + ".join(map(str, rolls))
-                return count * sides, detail
-            else:
-                rolls = [random.randint(1, sides) for _ in range(count)]
-                detail = " + ".join(map(str, rolls))
-                return sum(rolls), detail
-        else:
-            # 处理纯数字
-            return int(part), part
-
-    # 纯数字情况
-    if dice_expression.replace("+", "").replace("-", "").replace(" ", "").isdigit():
-        return dice_expression, int(dice_expression)
-
-    # 解析复合表达式 - 使用正则表达式或手动解析来正确处理加减号
-    # 这里使用简单的解析方法
     expression = dice_expression.replace(" ", "")  # 移除空格
     parts = []
     current_part = ""
@@ -256,35 +271,82 @@ def roll_dice(
     if current_part:
         parts.append(current_part)
 
-    # 如果没有操作符，直接返回
-    if len(parts) == 1:
-        result, detail = roll_single_dice(parts[0])
-        return detail.replace(" ", ""), result
-
-    # 计算结果
-    total = 0
-    details = []
+    terms = []
     current_operator = "+"
-
     for part in parts:
         if part in "+-":
             current_operator = part
+        elif "d" in part:
+            # 处理省略了前面数字的情况 (如 "d4" 应该等于 "1d4")
+            if part.startswith("d"):
+                count, sides = 1, int(part[1:])
+            else:
+                count, sides = map(int, part.split("d"))
+            terms.append((current_operator, count, sides, part))
         else:
-            result, detail = roll_single_dice(part)
-            if current_operator == "+":
-                total += result
-                details.append(f"+ {detail}")
+            # 处理纯数字
+            terms.append((current_operator, int(part), 0, part))
+
+    return tuple(terms)
+
+
+@lru_cache(maxsize=64)
+def _die_faces(sides: int) -> range:
+    """骰子各面点数"""
+    return range(1, sides + 1)
+
+
+def _roll_ndn(count: int, sides: int) -> List[int]:
+    """一次掷出 count 个 sides 面骰"""
+    return random.choices(_die_faces(sides), k=count)
+
+
+def roll_parsed(
+    terms: Tuple[Tuple[str, int, int, str], ...], use_max: Union[bool, int] = False
+) -> Tuple[str, int]:
+    """按 parse_dice 的解析结果掷骰，返回 (详细掷骰过程字符串, 总结果)"""
+    total = 0
+    details = []
+
+    for index, (operator, count, sides, text) in enumerate(terms):
+        if sides:
+            if use_max:
+                rolls = [sides] * count
             else:
-                total -= result
-                details.append(f"- {detail}")
+                rolls = _roll_ndn(count, sides)
+            value = sum(rolls)
+            detail = "+".join(map(str, rolls))
+        else:
+            value, detail = count, text
+
+        if operator == "-":
+            total -= value
+        else:
+            total += value
+        # 第一项不显示符号
+        details.append(detail if index == 0 else operator + detail)
+
+    return "".join(details), total
+
+
+def roll_dice(
+    dice_expression: str, use_max: Union[bool, int] = False
+) -> Tuple[str, int]:
+    """
+    解析并执行掷骰表达式
 
-    # 处理第一个元素的符号显示
-    if details and details[0].startswith("+ "):
-        details[0] = details[0][2:]  # 移除第一个元素的"+ "
+    Args:
+        dice_expression: 掷骰表达式 (如 "3d6+1-1")
+        use_max: 是否使用最大骰值，True时取满值
 
-    detail_str = " ".join(details)
+    Returns:
+        tuple: (详细掷骰过程字符串, 总结果)
+    """
+    # 纯数字情况
+    if dice_expression.replace("+", "").replace("-", "").replace(" ", "").isdigit():
+        return dice_expression, int(dice_expression)
 
-    return detail_str.replace(" ", ""), total
+    return roll_parsed(parse_dice(dice_expression), use_max)
 
 
 # 测试代码